@@ -1,9 +1,35 @@
 # src/analyze_claude.py
 from __future__ import annotations
+import asyncio
+import io
 import os
 from typing import List, Dict
-from anthropic import Anthropic
-from anthropic._exceptions import NotFoundError
+
+# anthropic / httpx はインポートが重いので初回利用時にロードする
+_Anthropic = None
+_NotFoundError = None
+
+def _sdk():
+    global _Anthropic, _NotFoundError
+    if _Anthropic is None:
+        from anthropic import Anthropic
+        from anthropic._exceptions import NotFoundError
+        _Anthropic, _NotFoundError = Anthropic, NotFoundError
+    return _Anthropic
+
+def _build_http_client():
+    """
+    Anthropic SDKに渡す持続HTTPクライアント。接続プールを絞りつつ
+    keep-aliveを効かせ、モデルフォールバック時のTLS再確立を避ける。
+    HTTP/2はh2パッケージがある場合のみ有効化。
+    """
+    import httpx
+    limits = httpx.Limits(max_keepalive_connections=8, max_connections=8)
+    timeout = httpx.Timeout(120.0, connect=10.0)
+    try:
+        return httpx.Client(http2=True, limits=limits, timeout=timeout)
+    except ImportError:
+        return httpx.Client(limits=limits, timeout=timeout)
 
 # =========================
 # 実務コンサル向け・高密度プロンプト
@@ -44,18 +70,30 @@ USER_TMPL = """
   * 出典リンクは必ずURLを明記し、本文の [n] と整合させる
 """
 
+# テンプレートはimport時にプレースホルダ前後で分割しておき、
+# 呼び出しごとの str.format ミニ言語パースを純粋なC文字列連結に置き換える
+_TMPL_PRE_THEME, _tmpl_rest = USER_TMPL.split("{theme}")
+_TMPL_PRE_SOURCES, _TMPL_POST_SOURCES = _tmpl_rest.split("{sources}")
+del _tmpl_rest
+
 def format_sources(docs: List[Dict]) -> str:
     """
     Claudeに渡すソース一覧（タイトル/URL/抜粋）。
     参照番号 [1].. と本文の [n] を対応させるためのひな型。
+    中間リストを作らず単一バッファに書き込む。
     """
-    out = []
+    buf = io.StringIO()
     for i, d in enumerate(docs, start=1):
-        title = d.get("title", "")
-        url = d.get("url", "")
-        excerpt = (d.get("content", "") or "")[:700]
-        out.append(f"[{i}] {title} — {url}\n抜粋:\n{excerpt}")
-    return "\n\n".join(out)
+        buf.write("[")
+        buf.write(str(i))
+        buf.write("] ")
+        buf.write(d.get("title", "") or "")
+        buf.write(" — ")
+        buf.write(d.get("url", "") or "")
+        buf.write("\n抜粋:\n")
+        buf.write((d.get("content", "") or "")[:700])
+        buf.write("\n\n")
+    return buf.getvalue().rstrip()
 
 class DeepAnalyzer:
     """
@@ -64,7 +102,11 @@ class DeepAnalyzer:
     - 既存コードと完全互換のインターフェイス
     """
     def __init__(self, api_key: str | None = None, model: str | None = None):
-        self.client = Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"))
+        self._http_client = _build_http_client()
+        self.client = _sdk()(
+            api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"),
+            http_client=self._http_client,
+        )
         # モデル候補（APIキーの権限差吸収）
         self.candidate_models = [
             model or "claude-3-sonnet-20240229",
@@ -78,6 +120,55 @@ class DeepAnalyzer:
             "opus": 8000,
         }
 
+    # プロセス内で1回だけ解決した利用可能モデル（クラス全体で共有）
+    _resolved_model: str | None = None
+
+    def close(self):
+        try:
+            self._http_client.close()
+        except Exception:
+            pass
+
+    def _probe(self, model: str) -> str | None:
+        """1トークンの最小呼び出しでモデルの利用可否を確認する。"""
+        try:
+            self.client.messages.create(
+                model=model,
+                max_tokens=1,
+                messages=[{"role": "user", "content": "."}],
+            )
+            return model
+        except Exception:
+            return None
+
+    def _resolve_model(self) -> str | None:
+        """
+        候補モデルを並行プローブし、最初に使えたものを記憶する。
+        逐次フォールバックだと404のたびに1往復ずつ待たされるが、
+        並行なら最も遅いプローブ1本分で済む。
+        """
+        if DeepAnalyzer._resolved_model is not None:
+            return DeepAnalyzer._resolved_model
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(self.candidate_models)) as ex:
+            results = list(ex.map(self._probe, self.candidate_models))
+        # candidate_models の優先順で最初に成功したものを採用
+        for m in results:
+            if m is not None:
+                DeepAnalyzer._resolved_model = m
+                return m
+        return None
+
+    def warmup(self):
+        """
+        収集フェーズと並走させる事前ウォームアップ。TLS/プール確立と
+        同時に利用可能モデルも解決しておく。失敗は無視。
+        """
+        try:
+            self._resolve_model()
+        except Exception:
+            pass
+
     def _cap_for_model(self, model: str, desired: int) -> int:
         name = model.lower()
         for key, cap in self.model_token_caps.items():
@@ -86,29 +177,69 @@ class DeepAnalyzer:
         # 未知モデルは保守的に4k
         return min(desired, 4000)
 
-    def _try_call(self, model: str, theme: str, sources_block: str) -> str:
+    def _try_call(self, model: str, theme: str, sources_block: str,
+                  on_text=None) -> str:
         # ご希望の出力量（高密度）を確保しつつ、モデルごとの上限で丸める
         desired_tokens = 5000
         max_tokens = self._cap_for_model(model, desired_tokens)
 
-        msg = self.client.messages.create(
+        # プロンプトキャッシュ：system と資料ブロックに cache_control を付け、
+        # フォールバック再試行時の入力トークン再課金とTTFTを抑える
+        user_content = [
+            {"type": "text", "text": _TMPL_PRE_THEME + theme + _TMPL_PRE_SOURCES},
+            {
+                "type": "text",
+                "text": sources_block,
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": _TMPL_POST_SOURCES},
+        ]
+
+        # ストリーミングで受信：全トークン生成完了を待たずに逐次処理できる
+        with self.client.messages.stream(
             model=model,
             max_tokens=max_tokens,
             temperature=0.3,  # 一貫性重視
-            system=ANALYSIS_SYSTEM,
-            messages=[{"role": "user", "content": USER_TMPL.format(theme=theme, sources=sources_block)}],
-        )
-        # テキストパートを連結（Anthropic SDKの標準構造）
-        return "".join([p.text for p in msg.content if getattr(p, "type", None) == "text"]) or ""
+            system=[{
+                "type": "text",
+                "text": ANALYSIS_SYSTEM,
+                "cache_control": {"type": "ephemeral"},
+            }],
+            messages=[{"role": "user", "content": user_content}],
+        ) as stream:
+            if on_text is None:
+                # 中間リストを作らず、ジェネレータを直接連結
+                return "".join(stream.text_stream)
+            chunks: List[str] = []
+            for piece in stream.text_stream:
+                chunks.append(piece)
+                on_text(piece)
+            return "".join(chunks)
 
-    def analyze(self, theme: str, docs: List[Dict]) -> str:
+    def analyze(self, theme: str, docs: List[Dict], on_text=None) -> str:
+        """
+        on_text: ストリーミング断片ごとに呼ばれる任意のコールバック
+        （途中保存や進捗表示用）。未指定なら従来どおり完成文字列のみ返す。
+        """
         sources_block = format_sources(docs)
         last_err = None
-        for m in self.candidate_models:
+        # プローブ済みモデルを先頭に、残りは従来どおり逐次フォールバック
+        resolved = DeepAnalyzer._resolved_model or self._resolve_model()
+        candidates = self.candidate_models
+        if resolved:
+            candidates = [resolved] + [m for m in candidates if m != resolved]
+        for m in candidates:
             try:
-                return self._try_call(m, theme, sources_block)
-            except NotFoundError as e:
+                return self._try_call(m, theme, sources_block, on_text=on_text)
+            except _NotFoundError as e:
                 # 次の候補にフォールバック
                 last_err = e
         # すべて失敗した場合は明示的に例外
         raise RuntimeError(f"No available Anthropic model for this API key. Last error: {last_err}")
+
+    async def analyze_async(self, theme: str, docs: List[Dict], on_text=None) -> str:
+        """
+        同期SDK呼び出しをワーカースレッドへ退避するasyncラッパ。
+        イベントループ上のファイルI/Oやインデックス更新と並走できる。
+        """
+        return await asyncio.to_thread(self.analyze, theme, docs, on_text)
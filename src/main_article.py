@@ -7,13 +7,14 @@ from typing import List, Dict, Tuple, Optional
 
 # 追加: メール送信用
 import smtplib
+import asyncio
 from email.message import EmailMessage
+from html import escape as _h
 
 # 相対インポート（python -m src.main_article で動く）
 from .research import Researcher
 from .analyze_claude import DeepAnalyzer
-import markdown2
-import yaml
+# markdown2 / yaml は使う関数内で遅延インポート（起動時間短縮）
 
 # ===== 基本設定（.envで上書き可） =====
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "public"))
@@ -24,30 +25,72 @@ TIMEZONE_HOURS = int(os.getenv("TIMEZONE_HOURS", "9"))  # JSTがデフォルト
 ENV_WEEKEND_TOPICS = [s.strip() for s in os.getenv("WEEKEND_TOPICS", "").split(",") if s.strip()]
 
 # ===== ユーティリティ =====
+# JSONシリアライズはorjsonがあればそちら（bytes直出しで数倍速い）
+try:
+    import orjson as _orjson
+
+    def _jdumps(obj) -> str:
+        return _orjson.dumps(obj).decode()
+except ImportError:
+    def _jdumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+
+# タイムゾーンは固定オフセットなのでimport時に1個だけ作る
+_LOCAL_TZ = timezone(timedelta(hours=TIMEZONE_HOURS))
+
 def now_local():
-    return datetime.utcnow().replace(tzinfo=timezone.utc) + timedelta(hours=TIMEZONE_HOURS)
+    return datetime.now(_LOCAL_TZ)
 
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
+# topics.yaml のパース結果キャッシュ（ファイル更新で自動無効化）
+_TOPICS_CACHE: Dict[Tuple[str, int], Tuple[List[str], List[str]]] = {}
+
+# YAMLローダーの解決は1回だけ（libyamlのC実装を優先、無ければ純Python）
+_YAML_LOADER = None
+
+def _yaml_loader():
+    global _YAML_LOADER
+    if _YAML_LOADER is None:
+        try:
+            from yaml import CSafeLoader as _YAML_LOADER
+        except ImportError:
+            from yaml import SafeLoader as _YAML_LOADER
+    return _YAML_LOADER
+
 def _read_topics_yaml() -> Tuple[List[str], List[str]]:
     """
     topics.yaml 仕様（後方互換）:
     - 旧: [AI, フィンテック, 量子, ロボティクス]
     - 新: { topics: [...], weekend_topics: [...] }
     weekend_topics が無い場合は環境変数 WEEKEND_TOPICS、さらに無ければ ["AI戦略"] を利用
+    パース結果は (path, mtime) キーでキャッシュし、ローダーはlibyaml(C実装)を優先。
     """
     topics: List[str] = []
     weekend_topics: List[str] = []
 
-    if TOPICS_FILE.exists():
-        with TOPICS_FILE.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
-        if isinstance(data, dict):
-            topics = [str(t) for t in (data.get("topics") or []) if t]
-            weekend_topics = [str(t) for t in (data.get("weekend_topics") or []) if t]
-        elif isinstance(data, list):
-            topics = [str(t) for t in data if t]
+    try:
+        st = TOPICS_FILE.stat()
+    except OSError:
+        st = None
+
+    if st is not None:
+        key = (str(TOPICS_FILE), st.st_mtime_ns)
+        cached = _TOPICS_CACHE.get(key)
+        if cached is not None:
+            topics, weekend_topics = cached
+        else:
+            import yaml
+            with TOPICS_FILE.open("r", encoding="utf-8") as f:
+                data = yaml.load(f, Loader=_yaml_loader()) or {}
+            if isinstance(data, dict):
+                topics = [str(t) for t in (data.get("topics") or []) if t]
+                weekend_topics = [str(t) for t in (data.get("weekend_topics") or []) if t]
+            elif isinstance(data, list):
+                topics = [str(t) for t in data if t]
+            _TOPICS_CACHE[key] = (topics, weekend_topics)
     # フォールバック
     if not topics:
         topics = ["テクノロジー総覧"]
@@ -73,48 +116,145 @@ def pick_today_topic(topics: List[str], weekend_topics: Optional[List[str]] = No
         return "テクノロジー総覧"
     return topics[weekday % len(topics)]
 
+# スラグ生成はC実装のre.subに任せる（\wはCJKを含むので日本語テーマも保持）
+_SLUG_RE = re.compile(r"[^\w\-]+", re.UNICODE)
+# タイトル抽出などの頻出パターンもimport時に1回だけコンパイル
+_TITLE_MD_RE = re.compile(r'^\s*#\s+(.+)$', re.MULTILINE)
+_TITLE_HTML_RE = re.compile(r"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_WS_RE = re.compile(r"\s+")
+
 def safe_slug(s: str) -> str:
-    return "".join(ch for ch in s if ch.isalnum() or ch in "-_").strip() or "topic"
+    return _SLUG_RE.sub("", s) or "topic"
 
 def extract_title(md_text: str) -> str | None:
-    m = re.search(r'^\s*#\s+(.+)$', md_text, re.MULTILINE)
+    m = _TITLE_MD_RE.search(md_text)
     return m.group(1).strip() if m else None
 
-def write_markdown(md_text: str, theme: str) -> Path:
+def article_stem(theme: str, when: Optional[datetime] = None) -> str:
+    """出力ファイル名の共通語幹「YYYY-MM-DD-スラグ」。1回計算して使い回す。"""
+    return f"{(when or now_local()).strftime('%Y-%m-%d')}-{safe_slug(theme)}"
+
+def write_markdown(md_text: str, theme: str, when: Optional[datetime] = None,
+                   stem: Optional[str] = None) -> Path:
     articles_dir = OUTPUT_DIR / "articles"
     ensure_dir(articles_dir)
-    date_str = now_local().strftime("%Y-%m-%d")
-    path = articles_dir / f"{date_str}-{safe_slug(theme)}.md"
-    path.write_text(md_text, encoding="utf-8")
+    path = articles_dir / f"{stem or article_stem(theme, when)}.md"
+    # UTF-8へのエンコードは1回だけ行い、バイト列をそのまま書く
+    path.write_bytes(md_text.encode("utf-8"))
     print(f"[ok] wrote markdown: {path}")
     return path
 
-def write_html_from_markdown(md_text: str, theme: str) -> Path:
+# Markdown→HTML変換器（初回利用時に最速の実装を選んで使い回す）
+_MD_RENDERER = None
+
+def _render_markdown(md_text: str) -> str:
+    """
+    速い順に cmarkgfm（C実装・GFM標準対応）→ markdown-it-py →
+    従来のmarkdown2 へフォールバック。選んだ実装は使い回す。
+    """
+    global _MD_RENDERER
+    if _MD_RENDERER is None:
+        try:
+            import cmarkgfm
+            _MD_RENDERER = cmarkgfm.github_flavored_markdown_to_html
+        except ImportError:
+            try:
+                from markdown_it import MarkdownIt
+                _MD_RENDERER = MarkdownIt("commonmark").enable(["table", "strikethrough"]).render
+            except ImportError:
+                import markdown2
+                # markdown()フリー関数は毎回Markdownオブジェクトとextras解釈を
+                # 作り直すため、インスタンスを1個だけ作って使い回す。
+                # 変換ごとの内部状態はreset()でクリアする
+                md2 = markdown2.Markdown(extras=["fenced-code-blocks", "tables"])
+
+                def _render_md2(text: str) -> str:
+                    md2.reset()
+                    return md2.convert(text)
+
+                _MD_RENDERER = _render_md2
+    return _MD_RENDERER(md_text)
+
+def write_html_from_markdown(md_text: str, theme: str, when: Optional[datetime] = None,
+                             stem: Optional[str] = None) -> Path:
     """Markdown を HTML に変換して保存（CSS付き・単一ページ）"""
     articles_dir = OUTPUT_DIR / "articles"
     ensure_dir(articles_dir)
-    date_str = now_local().strftime("%Y-%m-%d")
 
-    html_body = markdown2.markdown(md_text, extras=["fenced-code-blocks", "tables"])
-    title = extract_title(md_text) or theme
+    html_body = _render_markdown(md_text)
+    # タイトル類は必ずエスケープ（テーマ名の「<」等でHTMLが壊れるのを防ぐ）
+    title = _h(extract_title(md_text) or theme)
+    # 1つのf-stringで組み立て、+連結の中間文字列を作らない
     page = (
-        "<!doctype html><meta charset='utf-8'>"
+        f"<!doctype html><meta charset='utf-8'>"
         f"<title>{title}</title>"
-        "<link rel='stylesheet' href='https://cdn.jsdelivr.net/npm/water.css@2/out/water.css'>"
-        f"<h1>{title}</h1>\n" + html_body +
-        "<p><a href='./'>← 記事一覧へ</a></p>"
+        f"<link rel='stylesheet' href='https://cdn.jsdelivr.net/npm/water.css@2/out/water.css'>"
+        f"<h1>{title}</h1>\n{html_body}<p><a href='./'>← 記事一覧へ</a></p>"
     )
-    out = articles_dir / f"{date_str}-{safe_slug(theme)}.html"
-    out.write_text(page, encoding="utf-8")
+    out = articles_dir / f"{stem or article_stem(theme, when)}.html"
+    out.write_bytes(page.encode("utf-8"))
     print(f"[ok] wrote html: {out}")
     return out
 
-def rebuild_articles_index():
-    """articles ディレクトリ内の .html を拾って一覧を作り直す（降順）"""
+def _label_of(p: Path) -> str:
+    # HTMLタイトルを抽出（<title>...</title>）できれば優先。失敗時はファイル名。
+    # <title>はファイル先頭付近にあるので、まず先頭4KBだけ読んで済ませる
+    try:
+        with p.open("rb") as fh:
+            txt = fh.read(4096).decode("utf-8", errors="ignore")
+        m = _TITLE_HTML_RE.search(txt)
+        if m is None:
+            # まれにタイトルが後方にある場合のみ全読み
+            txt = p.read_text(encoding="utf-8", errors="ignore")
+            m = _TITLE_HTML_RE.search(txt)
+        if m:
+            return _WS_RE.sub(" ", m.group(1).strip())
+    except Exception:
+        pass
+    return p.stem
+
+def _scan_manifest(articles_dir: Path) -> List[Dict]:
+    """
+    フルスキャンでマニフェストを作り直す（初回・破損時のフォールバック）。
+    globのパターンマッチ＋Path生成を避け、os.scandirのエントリ
+    （d_typeキャッシュ付き）を名前だけでフィルタ・ソートする。
+    """
+    with os.scandir(articles_dir) as it:
+        names = sorted(
+            (e.name for e in it
+             if e.name.endswith(".html") and e.name != "index.html" and e.is_file()),
+            reverse=True,
+        )
+    return [{"name": n, "title": _label_of(articles_dir / n)} for n in names]
+
+def rebuild_articles_index(new_page: Optional[Path] = None, title: Optional[str] = None):
+    """
+    articles/ の一覧ページを更新する。
+    通常は index.json マニフェストに新しい1件を先頭挿入するだけのO(1)更新。
+    マニフェストが無い/壊れている場合のみディレクトリをフルスキャンする。
+    """
     articles_dir = OUTPUT_DIR / "articles"
     ensure_dir(articles_dir)
-    pages = sorted(articles_dir.glob("*.html"), reverse=True)
-    if not pages:
+    manifest_path = articles_dir / "index.json"
+
+    entries: List[Dict] = []
+    try:
+        loaded = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if isinstance(loaded, list):
+            entries = [e for e in loaded if isinstance(e, dict) and e.get("name")]
+    except Exception:
+        entries = []
+    if not entries:
+        entries = _scan_manifest(articles_dir)
+
+    if new_page is not None:
+        entry = {"name": new_page.name, "title": title or _label_of(new_page)}
+        entries = [e for e in entries if e["name"] != entry["name"]]
+        entries.insert(0, entry)
+
+    manifest_path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+
+    if not entries:
         # 初回用のプレースホルダ
         (articles_dir / "index.html").write_text(
             "<!doctype html><meta charset='utf-8'><title>Articles</title>"
@@ -125,22 +265,11 @@ def rebuild_articles_index():
         print(f"[ok] wrote placeholder index: {articles_dir/'index.html'}")
         return
 
-    def label(p: Path) -> str:
-        # HTMLタイトルを抽出（<title>...</title>）できれば優先。失敗時はファイル名
-        try:
-            txt = p.read_text(encoding="utf-8", errors="ignore")
-            m = re.search(r"<title>(.*?)</title>", txt, re.IGNORECASE | re.DOTALL)
-            if m:
-                return re.sub(r"\s+", " ", m.group(1).strip())
-        except Exception:
-            pass
-        return p.stem
-
-    lis = "\n".join(f"<li><a href='./{p.name}'>{label(p)}</a></li>" for p in pages)
+    lis = "\n".join([f"<li><a href='./{_h(e['name'])}'>{_h(e['title'])}</a></li>" for e in entries])
     html = (
-        "<!doctype html><meta charset='utf-8'><title>Articles</title>"
-        "<link rel='stylesheet' href='https://cdn.jsdelivr.net/npm/water.css@2/out/water.css'>"
-        "<h1>Articles</h1><ul>" + lis + "</ul><p><a href='../'>トップ</a></p>"
+        f"<!doctype html><meta charset='utf-8'><title>Articles</title>"
+        f"<link rel='stylesheet' href='https://cdn.jsdelivr.net/npm/water.css@2/out/water.css'>"
+        f"<h1>Articles</h1><ul>{lis}</ul><p><a href='../'>トップ</a></p>"
     )
     (articles_dir / "index.html").write_text(html, encoding="utf-8")
     print(f"[ok] rebuilt index: {articles_dir/'index.html'}")
@@ -180,9 +309,20 @@ def send_email_html(subject: str, html_body: str, recipients: list[str]):
         print(f"[ok] sent email to {recipients}")
 
 # ===== メイン処理 =====
+async def _collect_with_warmup(researcher: Researcher, analyzer: DeepAnalyzer,
+                               theme: str, max_results: int, weekend: bool) -> List[Dict]:
+    """収集（async）とClaudeウォームアップ（ブロッキング→別スレッド）を同時に走らせる。"""
+    docs, _ = await asyncio.gather(
+        researcher.collect_async(theme, max_results=max_results, weekend=weekend),
+        asyncio.to_thread(analyzer.warmup),
+    )
+    return docs
+
 def main():
     print("[info] start main_article")
     ensure_dir(OUTPUT_DIR / "articles")
+    # 実行時刻は1回だけ取得して全体で共有（深夜0時跨ぎで日付がずれるのも防ぐ）
+    run_now = now_local()
 
     # 1) テーマ決定（平日=ローテーション / 週末=固定技術テーマ）
     topics, weekend_topics = _read_topics_yaml()
@@ -198,24 +338,31 @@ def main():
             "Tavily の API キーが未設定です。GitHub → Settings → Secrets and variables → Actions に "
             "`TAVILY_API_KEY` を追加してください。"
         )
-        write_markdown(md, theme)
-        html_path = write_html_from_markdown(md, theme)
-        rebuild_articles_index()
+        stem = article_stem(theme, run_now)
+        write_markdown(md, theme, stem=stem)
+        html_path = write_html_from_markdown(md, theme, stem=stem)
+        rebuild_articles_index(new_page=html_path, title=extract_title(md) or theme)
         # Tavily未設定でもメール送信はスキップで終了
         print("[info] done main_article (no tavily key)")
         return
 
     researcher = Researcher(tavily_api_key=tavily_key)
+    analyzer = DeepAnalyzer()  # 既存と互換
+
     try:
         print("[info] collecting sources via Tavily ...")
-        # 検索精度強化：複数クエリの自動拡張・品質ブースト・重複排除を内部で実施
-        docs: List[Dict] = researcher.collect(theme, max_results=14, weekend=(now_local().weekday() >= 5))
+        # 検索精度強化：複数クエリの自動拡張・品質ブースト・重複排除を内部で実施。
+        # Claude側のウォームアップ（TLS確立＋モデル解決）はto_threadで収集と並走させる
+        docs: List[Dict] = asyncio.run(
+            _collect_with_warmup(researcher, analyzer, theme,
+                                 max_results=14, weekend=(run_now.weekday() >= 5))
+        )
         if not docs:
             print("[warn] docs empty; retry with expanded query")
             docs = researcher.collect(f"{theme} 最新 動向 企業 規制 投資 提携 ロードマップ ベンチマーク", max_results=14)
         # ログにURLだけ出す
         summary = [{"title": d.get("title"), "url": d.get("url")} for d in docs]
-        print(f"[debug] sources: {json.dumps(summary, ensure_ascii=False)[:2000]}")
+        print(f"[debug] sources: {_jdumps(summary)[:2000]}")
     except Exception as e:
         print(f"[error] tavily collect failed: {e}", file=sys.stderr)
         docs = []
@@ -223,7 +370,6 @@ def main():
     # 3) Claude で深掘り
     try:
         print("[info] calling Claude analyzer ...")
-        analyzer = DeepAnalyzer()  # 既存と互換
         md: str = analyzer.analyze(theme, docs)
         print(f"[debug] Claude output length = {len(md) if md else 0}")
         if not md or len(md.strip()) < 100:
@@ -236,10 +382,11 @@ def main():
         print(f"[error] Claude analyze raised: {e}", file=sys.stderr)
         md = f"# {theme}\n\n分析中に例外が発生しました: {e}"
 
-    # 4) 保存（.md と .html） + 一覧更新
-    write_markdown(md, theme)
-    html_path = write_html_from_markdown(md, theme)
-    rebuild_articles_index()
+    # 4) 保存（.md と .html） + 一覧更新（語幹は1回だけ計算して共有）
+    stem = article_stem(theme, run_now)
+    write_markdown(md, theme, stem=stem)
+    html_path = write_html_from_markdown(md, theme, stem=stem)
+    rebuild_articles_index(new_page=html_path, title=extract_title(md) or theme)
 
     # 5) メール送信（HTML本文）
     to_list = [s.strip() for s in os.getenv("NEWSLETTER_TO", "").split(",") if s.strip()]
@@ -1,14 +1,100 @@
 # src/research.py
 from __future__ import annotations
-import os, time, math, requests
-from typing import List, Dict, Iterable, Tuple
-from tavily import TavilyClient
-import trafilatura
+import os, time, math, json, hashlib, random, asyncio
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Iterable, Tuple, Optional
 from urllib.parse import urlparse
 from datetime import datetime, timezone
 
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124 Safari/537.36"
 
+# 1ソースあたり保持する本文の上限文字数。下流（format_sources）は700字しか
+# 使わないため、旧来の14000字はメモリの無駄だった。余裕をみて1500字。
+CONTENT_LIMIT = int(os.getenv("DOC_CONTENT_LIMIT", "1500"))
+
+# 重量級の依存（requests / httpx / trafilatura / tavily）は初回利用時に
+# インポートする。trafilaturaはlxmlを引き込むため、コールドスタート
+# （GitHub Actions等）の起動時間を数百ms短縮できる。
+
+_SESSION = None
+
+def _session():
+    """同期フェッチ用の共有セッション（keep-aliveをURL間で使い回す）。"""
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        s = requests.Session()
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        s.headers["User-Agent"] = UA
+        _SESSION = s
+    return _SESSION
+
+_TRAFILATURA = None
+_TRAF_CONFIG = None
+
+# 抽出オプションは全URL共通なのでimport時に1個だけ作って使い回す。
+# include_links=False でリンクテキストのノイズも落とし、下流のトークン数を減らす
+_EXTRACT_KW = dict(
+    include_tables=False,
+    include_comments=False,
+    include_links=False,
+    no_fallback=True,
+    favor_precision=True,
+    deduplicate=True,
+)
+
+def _traf():
+    """trafilaturaを遅延ロードし、高速設定（異常ページ10秒打ち切り）を初期化。"""
+    global _TRAFILATURA, _TRAF_CONFIG
+    if _TRAFILATURA is None:
+        import trafilatura
+        _TRAFILATURA = trafilatura
+        try:
+            from trafilatura.settings import use_config
+            _TRAF_CONFIG = use_config()
+            _TRAF_CONFIG.set("DEFAULT", "EXTRACTION_TIMEOUT", "10")
+        except Exception:
+            _TRAF_CONFIG = None
+    return _TRAFILATURA
+
+# ---------- ディスクキャッシュ ----------
+# 同じ日に再実行しても Tavily 再検索・再ダウンロードしないための軽量キャッシュ。
+# キーは blake2b ハッシュでファイル名長を抑える。壊れていても黙って作り直す。
+CACHE_DIR = Path(os.getenv("RESEARCH_CACHE_DIR", ".cache/research"))
+CACHE_TTL_SECONDS = int(os.getenv("RESEARCH_CACHE_TTL", str(6 * 3600)))
+
+def _cache_path(kind: str, key: str) -> Path:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return CACHE_DIR / kind / f"{digest}.json"
+
+def _cache_get(kind: str, key: str):
+    try:
+        p = _cache_path(kind, key)
+        if not p.exists():
+            return None
+        if time.time() - p.stat().st_mtime > CACHE_TTL_SECONDS:
+            return None
+        with p.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _cache_set(kind: str, key: str, value) -> None:
+    try:
+        p = _cache_path(kind, key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with p.open("w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+    except Exception:
+        pass
+
 # 品質ブースト（代表的な信頼メディア/一次情報源）
 PREFERRED_DOMAINS = {
     # ビジネス/テック主要
@@ -29,117 +115,168 @@ BLOCKED_DOMAINS = {
     "reddit.com", "substack.com", "quora.com", "facebook.com", "tiktok.com",
 }
 
+# 判定はホットパスなので、パターン集合をimport時に
+# 「完全一致セット / サブドメイン用サフィックス / ワイルドカード用プレフィックス」
+# に分解しておく。実行時は set lookup と C実装の str.endswith/startswith だけになる
+def _split_domain_patterns(pats: Iterable[str]) -> Tuple[frozenset, tuple, tuple]:
+    exact = frozenset(p for p in pats if "/" not in p and "*" not in p)
+    suffixes = tuple("." + p for p in exact)
+    prefixes = tuple(p[:-1] for p in pats if p.endswith(".*"))  # "investor.*" → "investor."
+    return exact, suffixes, prefixes
+
+_PREFERRED_EXACT, _PREFERRED_SUFFIXES, _PREFERRED_PREFIXES = _split_domain_patterns(PREFERRED_DOMAINS)
+_BLOCKED_EXACT, _BLOCKED_SUFFIXES, _BLOCKED_PREFIXES = _split_domain_patterns(BLOCKED_DOMAINS)
+
+# 同じURLはマージ・スコアリングで何度も評価されるため、パース結果をキャッシュ
+@lru_cache(maxsize=8192)
+def _domain_of(u: str) -> str:
+    try:
+        return urlparse(u).netloc.lower()
+    except Exception:
+        return ""
+
+# published_dateは重複排除前の結果集合で同じ文字列が繰り返し現れるため、
+# ISOパース結果（UNIX秒）をキャッシュ。パース不能はNone
+@lru_cache(maxsize=4096)
+def _published_ts(dt_str: str) -> float | None:
+    try:
+        return datetime.fromisoformat(dt_str.replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return None
+
 FORCED_TERMS = [
     "最新", "動向", "規制", "投資", "資金調達", "提携", "買収", "採用", "ロードマップ",
     "価格", "性能", "ベンチマーク", "導入事例", "PoC", "セキュリティ", "大手企業",
 ]
+_FORCED_TERMS_JOIN = " ".join(FORCED_TERMS)
 
 class Researcher:
     def __init__(self, tavily_api_key: str):
+        from tavily import TavilyClient
         self.client = TavilyClient(api_key=tavily_api_key)
 
     # ---------- 検索クエリ構築 ----------
     def _build_queries(self, theme: str, weekend: bool = False) -> List[str]:
         """
         週末は技術フォーカスを想定し、より技術寄り語を強める。
-        複数クエリを走らせ、結果をマージして重複排除・リランキングする。
+        直近性・ドメイン品質のフィルタはTavily側（topic=news / days /
+        exclude_domains）に寄せたので、クエリは2本で足りる。
         """
         base = theme.strip()
-        join = " ".join(FORCED_TERMS)
-        queries = [
-            f"{base} {join}",
-            f"{base} 企業 発表 プレスリリース 投資家向け情報 IR 提携",
-            f"{base} 規制 政策 ガイドライン 標準化 標準規格",
-            f"{base} 価格 性能 ベンチマーク 評価 比較",
-        ]
+        queries = [f"{base} {_FORCED_TERMS_JOIN}"]
         if weekend:
             queries.append(f"{base} アーキテクチャ 実装 研究 論文 arXiv ベストプラクティス")
+        else:
+            queries.append(f"{base} 企業 発表 プレスリリース IR 規制 提携 ベンチマーク")
         return queries
 
     # ---------- Tavily検索 ----------
     def search(self, query: str, max_results: int = 12) -> List[Dict]:
         """
-        Tavilyの基本検索。回答生成や生本文は不要なのでFalse。
+        Tavily検索。回答生成は不要だが、本文（raw_content）はサーバ側で
+        クロール済みのものを同梱してもらう——これで後段のURL個別
+        ダウンロードをほぼ丸ごと省略できる。
+        数時間以内の同一クエリはディスクキャッシュから返す。
         """
+        cache_key = f"{query}|{max_results}|raw|news30"
+        cached = _cache_get("search", cache_key)
+        if cached is not None:
+            return cached
         res = self.client.search(
             query=query,
             max_results=max_results,
             include_answer=False,
-            include_raw_content=False
+            include_raw_content=True,
+            search_depth="advanced",
+            # 直近性とドメイン除外はサーバ側でかけ、クライアント処理を減らす
+            topic="news",
+            days=30,
+            exclude_domains=sorted(_BLOCKED_EXACT),
         )
-        return res.get("results", [])
+        results = res.get("results", [])
+        _cache_set("search", cache_key, results)
+        return results
 
     # ---------- 本文抽出 ----------
     def fetch_clean(self, url: str, timeout: int = 25) -> str:
         """
-        trafilaturaで本文抽出。事前にHEAD/GETで到達性を確認し、空なら空文字を返す。
+        1回のGETでHTMLを取得し、trafilaturaで本文抽出。失敗・空なら空文字を返す。
         """
+        cached = _cache_get("page", url)
+        if cached is not None:
+            return cached
         try:
-            # 軽い到達性確認
-            requests.get(url, timeout=timeout, headers={"User-Agent": UA})
-            downloaded = trafilatura.fetch_url(url)
-            if downloaded:
-                text = trafilatura.extract(
-                    downloaded,
-                    include_tables=False,
-                    favor_recall=True
-                )
-                if text:
-                    return text
+            resp = _session().get(url, timeout=timeout)
+            text = self._extract(resp.text)
+            if text:
+                _cache_set("page", url, text)
+                return text
         except Exception:
             pass
         return ""
 
+    @staticmethod
+    def _extract(html: str) -> str:
+        """
+        trafilaturaの高速パスで本文抽出。jusText/readabilityの遅い
+        フォールバックは使わない（下流は抜粋しか使わないため十分）。
+        巨大ページは先頭200KBに切り詰めてから抽出し（本文はほぼ先頭側にある）、
+        戻り値もCONTENT_LIMITで打ち切って中間コピーを持たない。
+        """
+        if len(html) > 200_000:
+            html = html[:200_000]
+        traf = _traf()
+        if _TRAF_CONFIG is not None:
+            text = traf.extract(html, config=_TRAF_CONFIG, **_EXTRACT_KW)
+        else:
+            text = traf.extract(html, **_EXTRACT_KW)
+        return (text or "")[:CONTENT_LIMIT]
+
     # ---------- ドメイン判定 ----------
     @staticmethod
     def _domain_of(u: str) -> str:
-        try:
-            n = urlparse(u).netloc.lower()
-            return n
-        except Exception:
-            return ""
+        return _domain_of(u)
 
     @staticmethod
     def _is_blocked(domain: str) -> bool:
         if not domain:
             return True
-        if domain in BLOCKED_DOMAINS:
-            return True
-        for pat in BLOCKED_DOMAINS:
-            if pat in domain:
-                return True
-        return False
+        return domain in _BLOCKED_EXACT or domain.endswith(_BLOCKED_SUFFIXES)
 
     @staticmethod
     def _is_preferred(domain: str) -> bool:
-        for pat in PREFERRED_DOMAINS:
-            if pat == domain or pat in domain:
-                return True
-        return False
+        return (
+            domain in _PREFERRED_EXACT
+            or domain.endswith(_PREFERRED_SUFFIXES)
+            or domain.startswith(_PREFERRED_PREFIXES)
+        )
 
     # ---------- リランキング ----------
-    def _score_result(self, item: Dict) -> float:
+    def _score_result(self, item: Dict, domain: str | None = None,
+                      now_ts: float | None = None) -> float:
         """
         簡易スコアリング:
         - ドメイン品質（preferred:+1.0）
         - 直近性（published_dateがあれば減衰）
         - タイトル長・要語含有の軽い加点
+        domain / now_ts は呼び出し側で計算済みなら渡してもらい、
+        アイテムごとの再パース・now()呼び出しを避ける。
         """
-        url = item.get("url", "") or ""
         title = (item.get("title", "") or "").lower()
-        domain = self._domain_of(url)
+        if domain is None:
+            domain = self._domain_of(item.get("url", "") or "")
+        if now_ts is None:
+            now_ts = time.time()
         score = 0.0
         if self._is_preferred(domain):
             score += 1.0
         # 直近性（published_dateがISOで来る場合に限り）
         dt_str = item.get("published_date")
         if dt_str:
-            try:
-                dt = datetime.fromisoformat(dt_str.replace("Z","+00:00"))
-                age_days = max(0.0, (datetime.now(timezone.utc) - dt).total_seconds()/86400.0)
+            ts = _published_ts(dt_str)
+            if ts is not None:
+                age_days = max(0.0, (now_ts - ts) / 86400.0)
                 score += max(0.0, 0.8 * math.exp(-age_days/60.0))  # ~2ヶ月でほぼ減衰
-            except Exception:
-                pass
         # 用語ヒット
         for kw in ["regulation","規制","investment","投資","acquisition","買収","partnership","提携","benchmark","ベンチマーク","roadmap","ロードマップ","hiring","採用"]:
             if kw in title:
@@ -153,6 +290,7 @@ class Researcher:
     def _merge_dedup(self, result_lists: List[List[Dict]], per_domain_cap: int = 3) -> List[Dict]:
         seen_urls, merged = set(), []
         domain_counts: Dict[str, int] = {}
+        now_ts = time.time()  # ループ不変なので1回だけ取得
         # まとめて平坦化
         flat: List[Dict] = [r for lst in result_lists for r in lst if isinstance(lst, list)]
         # スコア算出
@@ -164,7 +302,7 @@ class Researcher:
             domain = self._domain_of(url)
             if self._is_blocked(domain):
                 continue
-            s = self._score_result(it)
+            s = self._score_result(it, domain, now_ts)
             scored.append((s, it, domain))
             seen_urls.add(url)
         # スコア順に並べ、ドメイン上限で間引く
@@ -176,41 +314,85 @@ class Researcher:
             domain_counts[domain] = cnt + 1
         return merged
 
+    # ---------- 非同期フェッチ ----------
+    async def _fetch_one(self, client: "httpx.AsyncClient", url: str,
+                         host_sems: Dict[str, asyncio.Semaphore], timeout: int = 25) -> str:
+        """
+        httpxで1URLを取得し、trafilaturaで本文抽出。失敗時は空文字。
+        礼儀はホスト単位のセマフォで制御：別ホスト同士は全並行、
+        同一ホストだけ同時2本＋短いジッタで間引く。
+        """
+        cached = _cache_get("page", url)
+        if cached is not None:
+            return cached
+        try:
+            async with host_sems[urlparse(url).netloc]:
+                await asyncio.sleep(random.uniform(0.05, 0.2))
+                resp = await client.get(url, timeout=timeout, headers={"User-Agent": UA})
+            text = self._extract(resp.text)
+            if text:
+                _cache_set("page", url, text)
+            return text
+        except Exception:
+            return ""
+
     # ---------- 収集メイン ----------
-    def collect(self, query: str, max_results: int = 12, weekend: bool = False) -> List[Dict]:
+    async def collect_async(self, query: str, max_results: int = 12, weekend: bool = False) -> List[Dict]:
         """
         - クエリを複数生成してTavily検索
         - 統合・重複排除・品質ブースト
-        - 各URLの本文を抽出（空は除外）
+        - 各URLの本文を並行フェッチで抽出（空は除外）
         """
         queries = self._build_queries(query, weekend=weekend)
-        all_results: List[List[Dict]] = []
-        for q in queries:
-            try:
-                res = self.search(q, max_results=max_results)
-                all_results.append(res)
-                time.sleep(0.3)
-            except Exception:
-                continue
+        # Tavily検索もネットワーク待ちが支配的なので全クエリを並行で投げる
+        # （同期クライアントはto_threadでワーカースレッドに退避）
+        search_results = await asyncio.gather(
+            *[asyncio.to_thread(self.search, q, max_results) for q in queries],
+            return_exceptions=True,
+        )
+        all_results: List[List[Dict]] = [r for r in search_results if isinstance(r, list)]
 
         merged = self._merge_dedup(all_results, per_domain_cap=3)
+        hits = [h for h in merged if h.get("url")]
+
+        # Tavilyがクロール済み本文を返したヒットはそのまま使い、
+        # 本文が無いものだけ自前で並行フェッチする
+        texts: Dict[str, str] = {}
+        to_fetch: List[Dict] = []
+        for h in hits:
+            raw = (h.get("raw_content") or "").strip()
+            if raw:
+                texts[h["url"]] = raw[:CONTENT_LIMIT]
+            else:
+                to_fetch.append(h)
+
+        if to_fetch:
+            # 残りを同時にフェッチ（待ち時間は合計ではなく最長の1本分になる）
+            import httpx
+            host_sems: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(2))
+            limits = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+            async with httpx.AsyncClient(limits=limits, follow_redirects=True) as client:
+                tasks = [asyncio.create_task(self._fetch_one(client, h["url"], host_sems)) for h in to_fetch]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            for h, text in zip(to_fetch, results):
+                if not isinstance(text, BaseException) and text:
+                    texts[h["url"]] = text
 
         bundle: List[Dict] = []
-        for h in merged:
-            url = h.get("url"); title = h.get("title", "")
-            if not url:
-                continue
-            text = self.fetch_clean(url)
+        for h in hits:
+            text = texts.get(h["url"])
             if not text:
                 continue
             bundle.append({
-                "title": title,
-                "url": url,
-                "content": text[:14000],
+                "title": h.get("title", ""),
+                "url": h["url"],
+                "content": text,  # 上流で既にCONTENT_LIMITに切り詰め済み
                 "published_date": h.get("published_date")
             })
-            # 過負荷回避
-            time.sleep(0.5)
 
         # 上位だけ返す
         return bundle[:max_results]
+
+    def collect(self, query: str, max_results: int = 12, weekend: bool = False) -> List[Dict]:
+        """同期シム。main_article.py からは従来どおりの呼び出しで動く。"""
+        return asyncio.run(self.collect_async(query, max_results=max_results, weekend=weekend))
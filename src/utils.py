@@ -1,8 +1,11 @@
 import re, unicodedata
 
+_DROP_RE = re.compile(r"[^a-z0-9\-\s_]")
+_SEP_RE = re.compile(r"[\s_]+")
+
 def slugify(text: str) -> str:
     text = unicodedata.normalize('NFKC', text)
     text = text.lower()
-    text = re.sub(r"[^a-z0-9\-\s_]", "", text)
-    text = re.sub(r"[\s_]+", "-", text).strip("-")
+    text = _DROP_RE.sub("", text)
+    text = _SEP_RE.sub("-", text).strip("-")
     return text[:80]